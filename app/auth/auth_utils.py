@@ -4,18 +4,24 @@ from sqlalchemy.orm import Session
 from app.models import models
 from app.auth.security import create_access_token
 from datetime import timedelta
+from app.services.metrics import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    with metrics.timer("bcrypt_duration_seconds", (("operation", "hash"),)):
+        return pwd_context.hash(password)
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    with metrics.timer("bcrypt_duration_seconds", (("operation", "verify"),)):
+        return pwd_context.verify(plain, hashed)
 
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    # Si el usuario no existe se corta acá, sin gastar CPU en bcrypt
+    if not user:
+        return None
+    if not verify_password(password, user.hashed_password):
         return None
     return user
 
@@ -0,0 +1,129 @@
+## Límite de intentos para login y registro mediante "token buckets".
+# Cada IP y cada nombre de usuario tiene un balde que se recarga a ritmo constante;
+# si está vacío el intento se rechaza antes de llegar a la base de datos o a bcrypt.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+
+# Capacidad (ráfaga máxima) y recarga (intentos por segundo) de cada balde
+LOGIN_IP_CAPACITY = int(os.getenv("LOGIN_IP_CAPACITY", "20"))
+LOGIN_IP_REFILL = float(os.getenv("LOGIN_IP_REFILL", "0.2")) # 12 por minuto
+LOGIN_USER_CAPACITY = int(os.getenv("LOGIN_USER_CAPACITY", "5"))
+LOGIN_USER_REFILL = float(os.getenv("LOGIN_USER_REFILL", "0.05")) # 3 por minuto
+REGISTER_IP_CAPACITY = int(os.getenv("REGISTER_IP_CAPACITY", "5"))
+REGISTER_IP_REFILL = float(os.getenv("REGISTER_IP_REFILL", "0.01")) # 36 por hora
+
+THROTTLE_MAX_KEYS = int(os.getenv("THROTTLE_MAX_KEYS", "100000"))
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "memory") # "memory" o "redis"
+# Cantidad de proxies propios (balanceador, etc.) que agregan una entrada a X-Forwarded-For.
+# Con 0 se ignora el header y se usa la IP de la conexión.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+
+class InMemoryBucketStore:
+    """Baldes en memoria del proceso. Cada clave guarda sólo (tokens, último acceso)
+    y se descartan las menos usadas al superar max_keys."""
+
+    def __init__(self, max_keys: int = THROTTLE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_per_second: float):
+        """Intenta consumir un token. Devuelve (permitido, segundos hasta el próximo token)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(capacity)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                self._buckets.move_to_end(key)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        retry_after = 0 if allowed else (1 - tokens) / refill_per_second
+        return allowed, retry_after
+
+
+class RedisBucketStore:
+    """Baldes compartidos entre varios workers usando Redis (requiere el paquete redis)."""
+
+    _SCRIPT = """
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local capacity = tonumber(ARGV[1])
+    local refill = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local tokens = tonumber(data[1])
+    if tokens == nil then
+        tokens = capacity
+    else
+        tokens = math.min(capacity, tokens + (now - tonumber(data[2])) * refill)
+    end
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill))
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._consume = self._client.register_script(self._SCRIPT)
+
+    def consume(self, key: str, capacity: int, refill_per_second: float):
+        allowed, tokens = self._consume(keys=[f"throttle:{key}"], args=[capacity, refill_per_second, time.time()])
+        allowed = bool(int(allowed))
+        retry_after = 0 if allowed else (1 - float(tokens)) / refill_per_second
+        return allowed, retry_after
+
+
+def _create_store():
+    if THROTTLE_BACKEND == "redis":
+        return RedisBucketStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return InMemoryBucketStore()
+
+
+bucket_store = _create_store()
+
+
+def client_ip(request: Request) -> str:
+    # Las entradas de la izquierda las controla el cliente; la IP confiable es la que
+    # agregó el proxy propio más externo, contando TRUSTED_PROXY_HOPS desde la derecha
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def _check(key: str, capacity: int, refill_per_second: float):
+    allowed, retry_after = bucket_store.consume(key, capacity, refill_per_second)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos. Intente nuevamente más tarde.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+def throttle_login(request: Request, username: str):
+    _check(f"login:ip:{client_ip(request)}", LOGIN_IP_CAPACITY, LOGIN_IP_REFILL)
+    _check(f"login:user:{username.strip().lower()}", LOGIN_USER_CAPACITY, LOGIN_USER_REFILL)
+
+
+def throttle_register(request: Request):
+    _check(f"register:ip:{client_ip(request)}", REGISTER_IP_CAPACITY, REGISTER_IP_REFILL)
@@ -1,13 +1,21 @@
 #rutas de login y registro
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
-from app.database import SessionLocal
+import time
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import Headers
+from app.database import SessionLocal, engine
 from app.auth.auth_utils import authenticate_user, login_user, get_password_hash
 from app.auth.dependencies import get_db
+from app.auth.throttling import throttle_login, throttle_register
 from app.models.models import User
 from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.security import OAuth2PasswordBearer
-from app.routes import department_routes, reservation_routes, user_routes, reservation_cost_routes
+from app.routes import department_routes, reservation_routes, user_routes, reservation_cost_routes, report_routes, blacklist_routes, guest_routes, archive_routes, job_routes, admin_routes
+from app.services.blacklist_index import blacklist_index
+from app.services.jobs import fail_interrupted_jobs
+from app.services.metrics import metrics, pool_gauges
+from app.services.profiling import ProfiledRoute, install_sql_timer, mark_request
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -18,11 +26,70 @@ app = FastAPI(
     description="Gestión de alojamientos",
     version="1.0.0"
 )
+app.router.route_class = ProfiledRoute
+install_sql_timer(engine)
 
 app.include_router(reservation_routes.router)
 app.include_router(department_routes.router)
 app.include_router(user_routes.router)
 app.include_router(reservation_cost_routes.router)
+app.include_router(report_routes.router)
+app.include_router(blacklist_routes.router)
+app.include_router(guest_routes.router)
+app.include_router(archive_routes.router)
+app.include_router(job_routes.router)
+app.include_router(admin_routes.router)
+
+class RequestInstrumentationMiddleware:
+    """Middleware ASGI puro (BaseHTTPMiddleware agrega cientos de µs por petición):
+    mide la latencia, cuenta las peticiones por ruta y estado y marca las que se perfilan."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Marca la petición para que su handler se ejecute bajo cProfile (ver app/services/profiling.py)
+        mark_request(Headers(scope=scope))
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.inc("http_requests_in_flight")
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Se usa la plantilla de la ruta ("/reservations/{reservation_id}") para no crear una serie por ID
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            labels = (("method", scope["method"]), ("route", path))
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start, labels)
+            metrics.inc("http_requests_total", labels + (("status", str(status_code)),))
+            metrics.inc("http_requests_in_flight", amount=-1)
+
+app.add_middleware(RequestInstrumentationMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(pool_gauges(engine)), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def mark_interrupted_jobs():
+    # Los trabajos que estaban en curso cuando se detuvo el servidor no se retoman
+    fail_interrupted_jobs()
+
+@app.on_event("startup")
+def load_blacklist_index():
+    # Se carga al iniciar para que la primera reserva no pague la carga completa
+    blacklist_index.reload()
 
 class UserCreate(BaseModel):
     username: str
@@ -34,7 +101,9 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 @app.post("/auth/register", response_model=Token)
-def register(user: UserCreate, db=Depends(get_db)):
+def register(user: UserCreate, request: Request, db=Depends(get_db)):
+    # Se limita antes de consultar la base y de calcular el hash con bcrypt
+    throttle_register(request)
     existing = db.query(User).filter(User.username == user.username).first()
     if existing:
         raise HTTPException(status_code=400, detail="Usuario ya existe")
@@ -49,7 +118,9 @@ def register(user: UserCreate, db=Depends(get_db)):
     return {"access_token": login_user(new_user), "token_type": "bearer"}
 
 @app.post("/auth/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+    # Los intentos rechazados nunca llegan a bcrypt
+    throttle_login(request, form_data.username)
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Float, Enum, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Float, Enum, Boolean, JSON
 from sqlalchemy.orm import relationship
 from .base import Base
 import enum
@@ -54,6 +54,17 @@ class BookingPlatform(Base):
     icon = Column(String, nullable=True) # URL o ruta del icono
 
 
+# Huéspedes (identificados por su teléfono en formato E.164)
+class Guest(Base):
+    __tablename__ = "guests"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    phone_e164 = Column(String, unique=True, index=True, nullable=False)
+
+    reservations = relationship("Reservation", back_populates="guest")
+
+
 # Estados de pago
 class PaymentStatus(str, enum.Enum):
     complete = "complete"
@@ -64,6 +75,8 @@ class PaymentStatus(str, enum.Enum):
 # Reservas
 class Reservation(Base):
     __tablename__ = "reservations"
+    # Los IDs no se reutilizan: las reservas archivadas conservan el suyo
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     guest_name = Column(String, nullable=False)
@@ -82,14 +95,17 @@ class Reservation(Base):
     is_blocked_on_other_platforms = Column(Boolean, default=False)
 
     department_id = Column(Integer, ForeignKey("departments.id"))
+    guest_id = Column(Integer, ForeignKey("guests.id"), nullable=True, index=True)
     department = relationship("Department", back_populates="reservations")
     platform = relationship("BookingPlatform")
+    guest = relationship("Guest", back_populates="reservations")
     costs = relationship("ReservationCost", back_populates="reservation")
 
 
 # Costos de la reserva
 class ReservationCost(Base):
     __tablename__ = "reservation_costs"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True)
     category = Column(String) # ej., "canasta de bienvenida", "limpieza", "lavandería"
@@ -97,12 +113,27 @@ class ReservationCost(Base):
     amount = Column(Float)
     date = Column(Date)
 
-    reservation_id = Column(Integer, ForeignKey("reservations.id"), nullable=False)
+    reservation_id = Column(Integer, ForeignKey("reservations.id"), nullable=False, index=True)
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
 
     reservation = relationship("Reservation", back_populates="costs")
 
 
+# Totales mensuales de costos por departamento y categoría (se actualizan con cada costo)
+class CostRollup(Base):
+    __tablename__ = "cost_rollups"
+
+    id = Column(Integer, primary_key=True)
+    # "departamento|categoría|mes" con vacío para los NULL: un UNIQUE sobre las tres
+    # columnas no impide filas duplicadas cuando alguna es NULL
+    rollup_key = Column(String, unique=True, nullable=False)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True, index=True)
+    category = Column(String, nullable=True, index=True) # Categoría normalizada
+    month = Column(Date, nullable=True, index=True) # Primer día del mes
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
 # Lista negra
 class BlacklistEntry(Base):
     __tablename__ = "blacklist"
@@ -111,4 +142,80 @@ class BlacklistEntry(Base):
     guest_name = Column(String)
     guest_phone = Column(String)
     reason = Column(String)
-    date_added = Column(Date)
\ No newline at end of file
+    date_added = Column(Date)
+
+
+# Versión de datos cacheados en memoria por cada worker (se incrementa en cada escritura)
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# Archivo de reservas históricas (estadías terminadas hace más que el horizonte configurado)
+class ArchivedReservation(Base):
+    __tablename__ = "reservations_archive"
+
+    id = Column(Integer, primary_key=True) # Se conserva el ID original de la reserva
+    guest_name = Column(String, nullable=False)
+    guest_phone = Column(String, nullable=True)
+    check_in = Column(Date, nullable=False, index=True)
+    check_out = Column(Date, nullable=False)
+    people_count = Column(Integer, nullable=False)
+    beds = Column(Integer, nullable=False)
+    origin_platform_id = Column(Integer, ForeignKey("booking_platforms.id"), nullable=True)
+    amount_usd = Column(Float, nullable=True)
+    amount_ars = Column(Float, nullable=False)
+    payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.pending)
+    total_revenue_ars = Column(Float, nullable=True)
+    down_payment_ars = Column(Float, nullable=True)
+    amount_due = Column(Float, nullable=True)
+    is_blocked_on_other_platforms = Column(Boolean, default=False)
+
+    department_id = Column(Integer, ForeignKey("departments.id"))
+    guest_id = Column(Integer, ForeignKey("guests.id"), nullable=True, index=True)
+
+    costs = relationship("ArchivedReservationCost", back_populates="reservation")
+
+
+# Costos de las reservas archivadas
+class ArchivedReservationCost(Base):
+    __tablename__ = "reservation_costs_archive"
+
+    id = Column(Integer, primary_key=True) # Se conserva el ID original del costo
+    category = Column(String)
+    description = Column(String)
+    amount = Column(Float)
+    date = Column(Date)
+
+    reservation_id = Column(Integer, ForeignKey("reservations_archive.id"), nullable=False, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+
+    reservation = relationship("ArchivedReservation", back_populates="costs")
+
+
+# Estados de un trabajo en segundo plano
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+# Trabajos en segundo plano (reportes y exportaciones pesadas)
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True) # UUID
+    kind = Column(String, nullable=False)
+    params = Column(JSON, nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False, index=True)
+    progress = Column(Float, default=0) # De 0 a 1
+    result_path = Column(String, nullable=True) # Archivo con el resultado en disco local
+    error = Column(String, nullable=True)
+    owner_host = Column(String, nullable=True) # Máquina y proceso que ejecutan el trabajo
+    owner_pid = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
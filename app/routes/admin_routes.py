@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.auth.dependencies import require_role
+from app.services.profiling import list_profiles, profile_path
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_role("admin"))])
+
+
+# Listar los perfiles capturados (más recientes primero)
+@router.get("/profiles")
+def get_profiles():
+    return list_profiles()
+
+
+# Descargar un perfil (.prof de cProfile, abrible con snakeviz o flameprof)
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado.")
+    return FileResponse(path, filename=f"{name}.prof", media_type="application/octet-stream")
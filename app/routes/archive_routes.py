@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.services.archive import ARCHIVE_BATCH_SIZE, ARCHIVE_HORIZON_DAYS, archive_reservations
+
+router = APIRouter(prefix="/archive", tags=["Archive"], route_class=ProfiledRoute)
+
+
+# Mover al archivo las reservas terminadas hace más de horizon_days días
+@router.post("/run")
+def run_archive(horizon_days: int = ARCHIVE_HORIZON_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE, db: Session = Depends(get_db)):
+    if horizon_days < 0 or batch_size <= 0:
+        raise HTTPException(status_code=400, detail="'horizon_days' no puede ser negativo y 'batch_size' debe ser mayor a 0.")
+    return archive_reservations(db, horizon_days, batch_size)
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import date
+
+from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.models.models import BlacklistEntry, Reservation
+from app.schemas.blacklist_schema import (
+    BlacklistEntryCreate, BlacklistEntryResponse, BlacklistEntryUpdate, ReservationScreening
+)
+from app.services.blacklist_index import BLACKLIST_VERSION, blacklist_index, normalize_phone
+from app.services.data_versions import bump_version
+
+router = APIRouter(prefix="/blacklist", tags=["Blacklist"], route_class=ProfiledRoute)
+
+
+# Busca coincidencias de un huésped en la lista negra usando el índice en memoria
+def screen_guest(db: Session, guest_name, guest_phone):
+    blacklist_index.ensure_loaded(db)
+    found = blacklist_index.match(guest_name, guest_phone)
+    if not found:
+        return []
+    entries = db.query(BlacklistEntry).filter(BlacklistEntry.id.in_(found.keys())).all()
+    return [
+        {"entry": entry, "matched_by": found[entry.id][0], "similarity": found[entry.id][1]}
+        for entry in entries
+    ]
+
+
+# Un teléfono que no se puede normalizar nunca coincidiría con el de una reserva
+def check_phone(guest_phone):
+    if guest_phone and normalize_phone(guest_phone) is None:
+        raise HTTPException(status_code=400, detail=f"El teléfono '{guest_phone}' no es válido.")
+
+
+# Crear una entrada en la lista negra
+@router.post("/", response_model=BlacklistEntryResponse)
+def create_entry(entry: BlacklistEntryCreate, db: Session = Depends(get_db)):
+    if not entry.guest_name and not entry.guest_phone:
+        raise HTTPException(status_code=400, detail="Debe proporcionar al menos 'guest_name' o 'guest_phone'.")
+    check_phone(entry.guest_phone)
+
+    entry_data = entry.model_dump()
+    if entry_data["date_added"] is None:
+        entry_data["date_added"] = date.today()
+
+    new_entry = BlacklistEntry(**entry_data)
+    db.add(new_entry)
+    version = bump_version(db, BLACKLIST_VERSION)
+    db.commit()
+    db.refresh(new_entry)
+    blacklist_index.add(new_entry, version)
+    return new_entry
+
+
+# Listar la lista negra
+@router.get("/", response_model=List[BlacklistEntryResponse])
+def list_entries(db: Session = Depends(get_db)):
+    return db.query(BlacklistEntry).all()
+
+
+# Controlar todas las reservas que todavía no terminaron contra la lista negra
+@router.get("/screen-upcoming", response_model=List[ReservationScreening])
+def screen_upcoming_reservations(db: Session = Depends(get_db)):
+    blacklist_index.ensure_loaded(db)
+    rows = db.query(
+        Reservation.id, Reservation.guest_name, Reservation.guest_phone,
+        Reservation.check_in, Reservation.check_out, Reservation.department_id
+    ).filter(Reservation.check_out >= date.today()).order_by(Reservation.check_in).all()
+
+    flagged = []
+    matched_ids = set()
+    for row in rows:
+        found = blacklist_index.match(row.guest_name, row.guest_phone)
+        if found:
+            flagged.append((row, found))
+            matched_ids.update(found.keys())
+
+    if not flagged:
+        return []
+
+    entries = {
+        entry.id: entry
+        for entry in db.query(BlacklistEntry).filter(BlacklistEntry.id.in_(matched_ids)).all()
+    }
+    return [
+        {
+            "reservation_id": row.id,
+            "guest_name": row.guest_name,
+            "guest_phone": row.guest_phone,
+            "check_in": row.check_in,
+            "check_out": row.check_out,
+            "department_id": row.department_id,
+            "matches": [
+                {"entry": entries[entry_id], "matched_by": matched_by, "similarity": similarity}
+                for entry_id, (matched_by, similarity) in found.items()
+                if entry_id in entries
+            ],
+        }
+        for row, found in flagged
+    ]
+
+
+# Obtener una entrada por ID
+@router.get("/{entry_id}", response_model=BlacklistEntryResponse)
+def get_entry(entry_id: int, db: Session = Depends(get_db)):
+    entry = db.query(BlacklistEntry).get(entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Entrada de lista negra no encontrada.")
+    return entry
+
+
+# Actualizar una entrada
+@router.put("/{entry_id}", response_model=BlacklistEntryResponse)
+def update_entry(entry_id: int, data: BlacklistEntryUpdate, db: Session = Depends(get_db)):
+    entry = db.query(BlacklistEntry).get(entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Entrada de lista negra no encontrada.")
+
+    updated_data = data.model_dump(exclude_unset=True)
+    check_phone(updated_data.get("guest_phone"))
+    for field, value in updated_data.items():
+        setattr(entry, field, value)
+
+    version = bump_version(db, BLACKLIST_VERSION)
+    db.commit()
+    db.refresh(entry)
+    blacklist_index.add(entry, version)
+    return entry
+
+
+# Eliminar una entrada
+@router.delete("/{entry_id}")
+def delete_entry(entry_id: int, db: Session = Depends(get_db)):
+    entry = db.query(BlacklistEntry).get(entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Entrada de lista negra no encontrada.")
+    db.delete(entry)
+    version = bump_version(db, BLACKLIST_VERSION)
+    db.commit()
+    blacklist_index.remove(entry_id, version)
+    return {"ok": True}
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.services.data_versions import bump_version
+from app.services.response_cache import DEPARTMENTS_TAG, cache, cached_json_response
 from app.models.models import Department
 from app.schemas.department_schema import DepartmentCreate, DepartmentRead, DepartmentUpdate
 
-router = APIRouter(prefix="/departments", tags=["Departments"])
+router = APIRouter(prefix="/departments", tags=["Departments"], route_class=ProfiledRoute)
 
 @router.post("/", response_model=DepartmentRead)
 def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
@@ -13,20 +16,29 @@ def create_department(department: DepartmentCreate, db: Session = Depends(get_db
         direction=department.direction
         )
     db.add(db_department)
+    bump_version(db, DEPARTMENTS_TAG)
     db.commit()
+    cache.invalidate(DEPARTMENTS_TAG)
     db.refresh(db_department)
     return db_department
 
 @router.get("/", response_model=list[DepartmentRead])
-def list_departments(db: Session = Depends(get_db)):
-    return db.query(Department).all()
+def list_departments(request: Request, db: Session = Depends(get_db)):
+    # Se sirve desde la caché en memoria; se invalida cuando cambia algún departamento
+    return cached_json_response(
+        request, db, (DEPARTMENTS_TAG,),
+        lambda: [DepartmentRead.model_validate(department) for department in db.query(Department).all()]
+    )
 
 @router.get("/{department_id}", response_model=DepartmentRead)
-def get_department(department_id: int, db: Session = Depends(get_db)):
-    department = db.query(Department).get(department_id)
-    if not department:
-        raise HTTPException(status_code=404, detail="Departamento no encontrado")
-    return department
+def get_department(department_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        department = db.query(Department).get(department_id)
+        if not department:
+            raise HTTPException(status_code=404, detail="Departamento no encontrado")
+        return DepartmentRead.model_validate(department)
+
+    return cached_json_response(request, db, (DEPARTMENTS_TAG,), load)
 
 @router.put("/{department_id}", response_model=DepartmentRead)
 def update_department(department_id: int, department_data: DepartmentUpdate, db: Session = Depends(get_db)):
@@ -35,7 +47,9 @@ def update_department(department_id: int, department_data: DepartmentUpdate, db:
         raise HTTPException(status_code=404, detail="Departamento no encontrado")
     department.name = department_data.name
     department.direction = department_data.direction
+    bump_version(db, DEPARTMENTS_TAG)
     db.commit()
+    cache.invalidate(DEPARTMENTS_TAG)
     db.refresh(department)
     return department
 
@@ -45,5 +59,7 @@ def delete_department(department_id: int, db: Session = Depends(get_db)):
     if not department:
         raise HTTPException(status_code=404, detail="Departamento no encontrado")
     db.delete(department)
+    bump_version(db, DEPARTMENTS_TAG)
     db.commit()
+    cache.invalidate(DEPARTMENTS_TAG)
     return {"ok": True, "mensaje": "Departamento eliminado correctamente"}
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.models.models import Guest
+from app.schemas.guest_schema import GuestResponse, GuestStays
+from app.services.archive import all_costs, all_reservations
+from app.services.guests import normalize_e164
+
+router = APIRouter(prefix="/guests", tags=["Guests"], route_class=ProfiledRoute)
+
+
+# Listar huéspedes, o buscar uno por teléfono (en cualquier formato)
+@router.get("/", response_model=List[GuestResponse])
+def list_guests(phone: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(Guest)
+    if phone is not None:
+        phone_e164 = normalize_e164(phone)
+        if phone_e164 is None:
+            raise HTTPException(status_code=400, detail="El teléfono no es válido.")
+        query = query.filter(Guest.phone_e164 == phone_e164)
+    return query.all()
+
+
+# Obtener un huésped por ID
+@router.get("/{guest_id}", response_model=GuestResponse)
+def get_guest(guest_id: int, db: Session = Depends(get_db)):
+    guest = db.query(Guest).get(guest_id)
+    if not guest:
+        raise HTTPException(status_code=404, detail="Huésped no encontrado.")
+    return guest
+
+
+# Historial de estadías del huésped con ingresos y costos de cada una
+@router.get("/{guest_id}/stays", response_model=GuestStays)
+def get_guest_stays(guest_id: int, db: Session = Depends(get_db)):
+    guest = db.query(Guest).get(guest_id)
+    if not guest:
+        raise HTTPException(status_code=404, detail="Huésped no encontrado.")
+
+    # Incluye las estadías archivadas
+    reservations = all_reservations(
+        "id", "department_id", "check_in", "check_out", "total_revenue_ars", "amount_ars", "guest_id"
+    )
+    reservation_costs = all_costs("reservation_id", "amount")
+
+    costs = db.query(
+        reservation_costs.c.reservation_id,
+        func.sum(reservation_costs.c.amount).label("total")
+    ).join(reservations, reservations.c.id == reservation_costs.c.reservation_id) \
+        .filter(reservations.c.guest_id == guest_id) \
+        .group_by(reservation_costs.c.reservation_id) \
+        .subquery()
+
+    rows = db.query(
+        reservations.c.id,
+        reservations.c.department_id,
+        reservations.c.check_in,
+        reservations.c.check_out,
+        func.coalesce(reservations.c.total_revenue_ars, reservations.c.amount_ars, 0),
+        func.coalesce(costs.c.total, 0),
+    ).outerjoin(costs, costs.c.reservation_id == reservations.c.id) \
+        .filter(reservations.c.guest_id == guest_id) \
+        .order_by(reservations.c.check_in) \
+        .all()
+
+    stays = [
+        {
+            "reservation_id": reservation_id,
+            "department_id": department_id,
+            "check_in": check_in,
+            "check_out": check_out,
+            "nights": (check_out - check_in).days,
+            "revenue_ars": revenue,
+            "costs_ars": cost,
+        }
+        for reservation_id, department_id, check_in, check_out, revenue, cost in rows
+    ]
+    total_revenue = sum(stay["revenue_ars"] for stay in stays)
+    total_costs = sum(stay["costs_ars"] for stay in stays)
+
+    return {
+        "guest": guest,
+        "total_stays": len(stays),
+        "total_nights": sum(stay["nights"] for stay in stays),
+        "total_revenue_ars": total_revenue,
+        "total_costs_ars": total_costs,
+        "net_profit_ars": total_revenue - total_costs,
+        "stays": stays,
+    }
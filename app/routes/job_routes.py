@@ -0,0 +1,57 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.models.models import Job, JobStatus
+from app.schemas.job_schema import JOB_PARAMS, JobCreate, JobResponse
+from app.services.jobs import JobQueueFull, submit_job
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], route_class=ProfiledRoute)
+
+
+# Encolar un trabajo; responde enseguida con el ID para consultar su estado
+@router.post("/", response_model=JobResponse, status_code=202)
+def create_job(job: JobCreate, db: Session = Depends(get_db)):
+    # Los parámetros se validan antes de encolar: un error se informa acá y no como trabajo fallido
+    try:
+        params = JOB_PARAMS[job.kind].model_validate(job.params).model_dump(mode="json")
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+    try:
+        return submit_job(db, job.kind.value, params)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Hay demasiados trabajos pendientes. Intente más tarde.")
+
+
+# Listar los trabajos más recientes
+@router.get("/", response_model=List[JobResponse])
+def list_jobs(limit: int = 50, db: Session = Depends(get_db)):
+    return db.query(Job).order_by(Job.created_at.desc()).limit(limit).all()
+
+
+# Consultar estado y progreso de un trabajo
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(Job).get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return job
+
+
+# Descargar el archivo generado por un trabajo terminado
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(Job).get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    if job.status != JobStatus.done:
+        raise HTTPException(status_code=409, detail="El trabajo todavía no terminó.")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=404, detail="El archivo del resultado ya no existe.")
+    return FileResponse(job.result_path, filename=os.path.basename(job.result_path))
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+
+from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.models.models import CostRollup
+from app.schemas.report_schema import CostGroupBy, CostReport, OccupancyGroupBy, OccupancyReport
+from app.services.cost_rollup import normalize_category
+from app.services.analytics import MAX_RANGE_DAYS, occupancy_metrics
+
+router = APIRouter(prefix="/reports", tags=["Reports"], route_class=ProfiledRoute)
+
+
+# Ocupación, ADR y RevPAR en el rango [start, end)
+@router.get("/occupancy", response_model=OccupancyReport)
+def get_occupancy(
+    start: date = Query(..., description="Fecha inicial (inclusive)"),
+    end: date = Query(..., description="Fecha final (exclusive)"),
+    group_by: OccupancyGroupBy = OccupancyGroupBy.department,
+    db: Session = Depends(get_db),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la fecha inicial.")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar los {MAX_RANGE_DAYS} días.")
+
+    return {
+        "start": start,
+        "end": end,
+        "group_by": group_by,
+        "rows": occupancy_metrics(db, start, end, group_by.value),
+    }
+
+
+# Costos agrupados por categoría, departamento o mes (leídos de los rollups mensuales)
+@router.get("/costs", response_model=CostReport)
+def get_costs(
+    group_by: CostGroupBy = CostGroupBy.category,
+    start: Optional[date] = Query(None, description="Desde este mes (inclusive)"),
+    end: Optional[date] = Query(None, description="Hasta este mes (inclusive)"),
+    department_id: Optional[int] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    column = {
+        CostGroupBy.category: CostRollup.category,
+        CostGroupBy.department: CostRollup.department_id,
+        CostGroupBy.month: CostRollup.month,
+    }[group_by]
+
+    query = db.query(column, func.sum(CostRollup.total), func.sum(CostRollup.count))
+    if start is not None:
+        query = query.filter(CostRollup.month >= start.replace(day=1))
+    if end is not None:
+        query = query.filter(CostRollup.month <= end.replace(day=1))
+    if department_id is not None:
+        query = query.filter(CostRollup.department_id == department_id)
+    if category is not None:
+        query = query.filter(CostRollup.category == normalize_category(category))
+
+    rows = [
+        {
+            "key": key.strftime("%Y-%m") if group_by == CostGroupBy.month and key is not None else key,
+            "total": total or 0,
+            "count": count or 0,
+        }
+        for key, total, count in query.group_by(column).order_by(column).all()
+        if count
+    ]
+    return {"group_by": group_by, "total": sum(row["total"] for row in rows), "rows": rows}
@@ -3,10 +3,12 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
+from app.services.cost_rollup import add_cost, cost_key, normalize_category, remove_cost
+from app.services.profiling import ProfiledRoute
 from app.models.models import ReservationCost, Reservation
 from app.schemas.reservation_cost_schema import ReservationCostCreate, ReservationCostResponse, ReservationCostUpdate
 
-router = APIRouter(prefix="/reservation-costs", tags=["Reservation Costs"])
+router = APIRouter(prefix="/reservation-costs", tags=["Reservation Costs"], route_class=ProfiledRoute)
 
 
 # Crear un nuevo costo asociado a una reserva
@@ -17,7 +19,9 @@ def create_cost(cost: ReservationCostCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Reserva no encontrada.")
 
     new_cost = ReservationCost(**cost.dict())
+    new_cost.category = normalize_category(new_cost.category)
     db.add(new_cost)
+    add_cost(db, new_cost)
     db.commit()
     db.refresh(new_cost)
     return new_cost
@@ -51,9 +55,14 @@ def update_cost(cost_id: int, data: ReservationCostUpdate, db: Session = Depends
     if not cost:
         raise HTTPException(status_code=404, detail="Costo no encontrado.")
 
+    previous_key = cost_key(db, cost)
     for field, value in data.dict(exclude_unset=True).items():
         setattr(cost, field, value)
+    cost.category = normalize_category(cost.category)
 
+    # Se descuenta el costo anterior del rollup y se suma el nuevo
+    remove_cost(db, previous_key)
+    add_cost(db, cost)
     db.commit()
     db.refresh(cost)
     return cost
@@ -65,6 +74,7 @@ def delete_cost(cost_id: int, db: Session = Depends(get_db)):
     cost = db.query(ReservationCost).get(cost_id)
     if not cost:
         raise HTTPException(status_code=404, detail="Costo no encontrado.")
+    remove_cost(db, cost_key(db, cost))
     db.delete(cost)
     db.commit()
     return {"ok": True}
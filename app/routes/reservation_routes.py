@@ -6,10 +6,17 @@ from datetime import date
 
 from app.schemas.reservation_schema import ReservationCreate, ReservationResponse, ReservationUpdate
 from app.models.models import PaymentStatus, Reservation, ReservationCost, BookingPlatform, Department
+from app.models.models import ArchivedReservation, ArchivedReservationCost
 from app.database import get_db
+from app.services.profiling import ProfiledRoute
+from app.services.response_cache import PLATFORMS_TAG, cached_value
+from app.routes.blacklist_routes import screen_guest
+from app.services.cost_rollup import move_reservation_costs
+from app.services.guests import get_or_create_guest
+from app.services.metrics import metrics
 
 
-router = APIRouter(prefix="/reservations", tags=["Reservas"])
+router = APIRouter(prefix="/reservations", tags=["Reservas"], route_class=ProfiledRoute)
 
 # Tasa de cambio actual (por el momento, luego se podría integrar una API)
 USD_TO_ARS_RATE = 1200
@@ -41,24 +48,57 @@ def check_overlapping_reservation(db: Session, check_in: date, check_out: date,
         query = query.filter(Reservation.id != reservation_id)
 
     if query.first():
+        metrics.inc("reservation_overlap_rejections_total")
         raise HTTPException(
             status_code=400,
             detail="Ya existe una reserva para esas fechas en este departamento."
         )
     
 
+# Indica si existe la plataforma. Los IDs existentes se guardan en caché; si el ID no
+# está en la caché se consulta igual a la base (las plataformas se cargan directo en la DB)
+def platform_exists(db: Session, platform_id: int):
+    platform_ids = cached_value(
+        ("platform_ids",), (PLATFORMS_TAG,),
+        lambda: frozenset(platform for (platform,) in db.query(BookingPlatform.id).all())
+    )
+    if platform_id in platform_ids:
+        return True
+    return db.query(BookingPlatform.id).filter(BookingPlatform.id == platform_id).first() is not None
+
 # Verifica si el ID de plataforma de origen existe
 def check_origin_platform_exist(db: Session, platform_id: int):
-    platform = db.query(BookingPlatform).filter(BookingPlatform.id == platform_id).first()
-    if not platform:
+    if not platform_exists(db, platform_id):
         raise HTTPException(
             status_code=400,
             detail=f"El 'origin_platform_id' {platform_id} no existe en la base de datos de plataformas de reserva."
         )
 
+# Verifica que el huésped no figure en la lista negra (teléfono exacto o nombre parecido)
+def check_blacklist(db: Session, guest_name: str, guest_phone: Optional[str]):
+    matches = screen_guest(db, guest_name, guest_phone)
+    if matches:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "mensaje": "El huésped coincide con una entrada de la lista negra.",
+                "coincidencias": [
+                    {
+                        "blacklist_id": match["entry"].id,
+                        "guest_name": match["entry"].guest_name,
+                        "guest_phone": match["entry"].guest_phone,
+                        "reason": match["entry"].reason,
+                        "matched_by": match["matched_by"],
+                        "similarity": round(match["similarity"], 2),
+                    }
+                    for match in matches
+                ],
+            }
+        )
+
 # Crear una nueva reserva
 @router.post("/", response_model=ReservationResponse)
-def create_reservation(reservation: ReservationCreate, db: Session = Depends(get_db)):
+def create_reservation(reservation: ReservationCreate, skip_blacklist_check: bool = False, db: Session = Depends(get_db)):
     reservation_data = reservation.model_dump()
 
     # Valida que el id de departamento sea uno valido
@@ -71,6 +111,10 @@ def create_reservation(reservation: ReservationCreate, db: Session = Depends(get
     if "origin_platform_id" in reservation_data and reservation_data["origin_platform_id"] is not None:
         check_origin_platform_exist(db, reservation_data["origin_platform_id"])
 
+    # Control contra la lista negra (se puede omitir explícitamente con skip_blacklist_check)
+    if not skip_blacklist_check:
+        check_blacklist(db, reservation.guest_name, reservation.guest_phone)
+
     # Lógica de cálculo de amount_ars
     # Aseguramos que amount_ars siempre tenga un valor antes de ser guardado
     if reservation_data.get("amount_usd")!=0:
@@ -108,11 +152,16 @@ def create_reservation(reservation: ReservationCreate, db: Session = Depends(get
         reservation_data["amount_due"] = 0
         reservation_data["down_payment_ars"] = 0
 
+    # Vincular la reserva con el perfil del huésped (por teléfono)
+    guest = get_or_create_guest(db, reservation.guest_name, reservation.guest_phone)
+    reservation_data["guest_id"] = guest.id if guest else None
+
     # Crear objeto reserva
     new_reservation = Reservation(**reservation_data)
 
     db.add(new_reservation)
     db.commit()
+    metrics.inc("reservations_created_total")
     db.refresh(new_reservation)
     return new_reservation
 
@@ -149,8 +198,7 @@ def update_reservation(reservation_id: int, data: ReservationUpdate, db: Session
         platform_id = updated_data["origin_platform_id"]
         if platform_id == 0:
             raise HTTPException(status_code=400, detail="El 'origin_platform_id' no puede ser 0. Use 'null' para reservas directas.")
-        existing_platform = db.query(BookingPlatform).filter(BookingPlatform.id == platform_id).first()
-        if not existing_platform:
+        if not platform_exists(db, platform_id):
             raise HTTPException(status_code=400, detail=f"El 'origin_platform_id' {platform_id} no existe en la base de datos de plataformas de reserva.")
     elif "origin_platform_id" in updated_data and updated_data["origin_platform_id"] is None:
         # Si se envía explícitamente null, permitimos que se borre la referencia a la plataforma
@@ -167,10 +215,21 @@ def update_reservation(reservation_id: int, data: ReservationUpdate, db: Session
         raise HTTPException(status_code=400, detail="'amount_ars' no puede ser nulo. Debe proporcionar un valor válido.")
 
 
+    previous_department_id = reservation.department_id
+
     # Actualizar los campos de la reserva con los datos nuevos
     for field, value in updated_data.items():
         setattr(reservation, field, value)
 
+    # Los costos sin departamento propio se agrupan con el de la reserva: si cambió, se mueven sus totales
+    if reservation.department_id != previous_department_id:
+        move_reservation_costs(db, reservation.id, previous_department_id, reservation.department_id)
+
+    # Si cambió el teléfono, se vuelve a vincular con el huésped correspondiente
+    if "guest_phone" in updated_data:
+        guest = get_or_create_guest(db, reservation.guest_name, reservation.guest_phone)
+        reservation.guest_id = guest.id if guest else None
+
     # Validar fechas si se actualizaron (usando los valores actualizados en 'reservation')
     check_in = reservation.check_in
     check_out = reservation.check_out
@@ -217,8 +276,12 @@ def delete_reservation(reservation_id: int, db: Session = Depends(get_db)):
 #Ganancia neta = total_revenue_ars (o amount_ars si no hay total) - suma de todos los costos asociados a esa reserva.
 @router.get("/{reservation_id}/net_profit")
 def get_net_profit(reservation_id: int = Path(..., description="ID de la reserva"), db: Session = Depends(get_db)):
-    # Buscar la reserva
+    # Buscar la reserva (si no está entre las activas, se busca en el archivo)
     reservation = db.query(Reservation).get(reservation_id)
+    cost_model = ReservationCost
+    if not reservation:
+        reservation = db.query(ArchivedReservation).get(reservation_id)
+        cost_model = ArchivedReservationCost
     if not reservation:
         raise HTTPException(status_code=404, detail="Reserva no encontrada.")
 
@@ -227,8 +290,8 @@ def get_net_profit(reservation_id: int = Path(..., description="ID de la reserva
     total_income = reservation.total_revenue_ars or reservation.amount_ars
 
     # Sumar los costos asociados
-    total_cost = db.query(func.coalesce(func.sum(ReservationCost.amount), 0)) \
-        .filter(ReservationCost.reservation_id == reservation_id) \
+    total_cost = db.query(func.coalesce(func.sum(cost_model.amount), 0)) \
+        .filter(cost_model.reservation_id == reservation_id) \
         .scalar()
 
     # Calcular ganancia neta
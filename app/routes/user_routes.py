@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.services.profiling import ProfiledRoute
 from app.models.models import User, UserRole
 from app.schemas.user_schema import UserCreate, UserRead, UserUpdate
 from sqlalchemy.exc import IntegrityError
+from app.services.metrics import metrics
 
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    with metrics.timer("bcrypt_duration_seconds", (("operation", "hash"),)):
+        return pwd_context.hash(password)
 
 @router.post("/", response_model=UserRead)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,46 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+
+class BlacklistEntryBase(BaseModel):
+    guest_name: Optional[str] = None
+    guest_phone: Optional[str] = None
+    reason: Optional[str] = None
+
+
+class BlacklistEntryCreate(BlacklistEntryBase):
+    date_added: Optional[date] = None # Si no se envía, se usa la fecha de hoy
+
+
+class BlacklistEntryUpdate(BaseModel):
+    guest_name: Optional[str] = None
+    guest_phone: Optional[str] = None
+    reason: Optional[str] = None
+    date_added: Optional[date] = None
+
+
+class BlacklistEntryResponse(BlacklistEntryBase):
+    id: int
+    date_added: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Coincidencia de un huésped con una entrada de la lista negra
+class BlacklistMatch(BaseModel):
+    entry: BlacklistEntryResponse
+    matched_by: str # "phone" o "name"
+    similarity: float
+
+
+# Resultado del control masivo de reservas próximas
+class ReservationScreening(BaseModel):
+    reservation_id: int
+    guest_name: str
+    guest_phone: Optional[str] = None
+    check_in: date
+    check_out: date
+    department_id: Optional[int] = None
+    matches: List[BlacklistMatch]
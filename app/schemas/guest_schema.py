@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+
+class GuestBase(BaseModel):
+    name: str
+    phone_e164: str
+
+
+class GuestResponse(GuestBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class GuestStay(BaseModel):
+    reservation_id: int
+    department_id: Optional[int] = None
+    check_in: date
+    check_out: date
+    nights: int
+    revenue_ars: float
+    costs_ars: float
+
+
+# Historial completo de estadías de un huésped
+class GuestStays(BaseModel):
+    guest: GuestResponse
+    total_stays: int
+    total_nights: int
+    total_revenue_ars: float
+    total_costs_ars: float
+    net_profit_ars: float
+    stays: List[GuestStay]
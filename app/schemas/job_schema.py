@@ -0,0 +1,80 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, datetime
+from typing import Optional
+from enum import Enum
+
+from app.schemas.report_schema import OccupancyGroupBy
+from app.services.analytics import MAX_RANGE_DAYS
+from app.services.archive import ARCHIVE_BATCH_SIZE, ARCHIVE_HORIZON_DAYS
+
+
+# Tipos de trabajo disponibles
+class JobKind(str, Enum):
+    reservations_export = "reservations_export" # CSV con todas las reservas
+    occupancy_report = "occupancy_report" # params: start, end, group_by
+    archive = "archive" # params: horizon_days, batch_size
+
+
+# Parámetros de cada tipo de trabajo (se validan al encolar, no al ejecutar)
+class ReservationsExportParams(BaseModel):
+    class Config:
+        extra = "forbid"
+
+
+class OccupancyReportParams(BaseModel):
+    start: date
+    end: date
+    group_by: OccupancyGroupBy = OccupancyGroupBy.department
+
+    class Config:
+        extra = "forbid"
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.end <= self.start:
+            raise ValueError("La fecha final debe ser posterior a la fecha inicial.")
+        if (self.end - self.start).days > MAX_RANGE_DAYS:
+            raise ValueError(f"El rango no puede superar los {MAX_RANGE_DAYS} días.")
+        return self
+
+
+class ArchiveParams(BaseModel):
+    horizon_days: int = Field(ARCHIVE_HORIZON_DAYS, ge=0)
+    batch_size: int = Field(ARCHIVE_BATCH_SIZE, gt=0)
+
+    class Config:
+        extra = "forbid"
+
+
+JOB_PARAMS = {
+    JobKind.reservations_export: ReservationsExportParams,
+    JobKind.occupancy_report: OccupancyReportParams,
+    JobKind.archive: ArchiveParams,
+}
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class JobCreate(BaseModel):
+    kind: JobKind
+    params: dict = {}
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    params: Optional[dict] = None
+    status: JobStatus
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
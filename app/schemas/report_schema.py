@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional, Union
+from enum import Enum
+
+
+# Agrupaciones disponibles para las métricas de ocupación
+class OccupancyGroupBy(str, Enum):
+    department = "department"
+    platform = "platform"
+    month = "month"
+
+
+class OccupancyRow(BaseModel):
+    key: Union[int, str] # ID de departamento, ID de plataforma ("direct" si no tiene) o mes "YYYY-MM"
+    available_nights: int
+    occupied_nights: int
+    revenue_ars: float
+    occupancy_rate: float # Noches ocupadas / noches disponibles
+    adr: float # Tarifa promedio diaria: ingresos / noches ocupadas
+    revpar: float # Ingreso por unidad disponible: ingresos / noches disponibles
+
+
+class OccupancyReport(BaseModel):
+    start: date
+    end: date
+    group_by: OccupancyGroupBy
+    rows: List[OccupancyRow]
+
+
+# Agrupaciones disponibles para el reporte de costos
+class CostGroupBy(str, Enum):
+    category = "category"
+    department = "department"
+    month = "month"
+
+
+class CostRow(BaseModel):
+    key: Optional[Union[int, str]] = None # Categoría, ID de departamento o mes "YYYY-MM"
+    total: float
+    count: int
+
+
+class CostReport(BaseModel):
+    group_by: CostGroupBy
+    total: float
+    rows: List[CostRow]
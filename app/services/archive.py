@@ -0,0 +1,97 @@
+# Separación entre reservas "calientes" (operativas) y archivadas.
+# Las rutas operativas sólo leen las tablas principales; los reportes usan
+# las uniones de abajo para ver también el historial archivado.
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import delete, exists, insert, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.models import ArchivedReservation, ArchivedReservationCost, Reservation, ReservationCost
+
+# Días desde el check-out a partir de los cuales una reserva se archiva
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = 500
+
+RESERVATION_COLUMNS = [column.name for column in Reservation.__table__.columns]
+COST_COLUMNS = [column.name for column in ReservationCost.__table__.columns]
+
+
+def archive_reservations(db: Session, horizon_days: int = ARCHIVE_HORIZON_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """Mueve por lotes al archivo las reservas con check-out anterior al horizonte,
+    junto con sus costos. Cada lote se copia y se borra en la misma transacción."""
+    # Un horizonte negativo dejaría el corte en el futuro y archivaría reservas vigentes,
+    # que los controles de superposición (sólo leen las tablas activas) dejarían de ver
+    if horizon_days < 0:
+        raise ValueError("'horizon_days' no puede ser negativo.")
+    if batch_size <= 0:
+        raise ValueError("'batch_size' debe ser mayor a 0.")
+    cutoff = date.today() - timedelta(days=horizon_days)
+    archived = 0
+    archived_costs = 0
+
+    # Una reserva (o alguno de sus costos) cuyo ID ya está en el archivo no se mueve:
+    # pasa en bases SQLite creadas antes de sqlite_autoincrement, que reutilizaban IDs
+    id_in_archive = exists().where(ArchivedReservation.id == Reservation.id)
+    cost_id_in_archive = exists().where(
+        ReservationCost.reservation_id == Reservation.id,
+        ArchivedReservationCost.id == ReservationCost.id,
+    )
+    archivable = db.query(Reservation.id).filter(
+        Reservation.check_out < cutoff, ~id_in_archive, ~cost_id_in_archive
+    )
+
+    while True:
+        ids = [reservation_id for (reservation_id,) in archivable.order_by(Reservation.id).limit(batch_size)]
+        if not ids:
+            break
+
+        reservations = Reservation.__table__
+        costs = ReservationCost.__table__
+        db.execute(
+            insert(ArchivedReservation.__table__).from_select(
+                RESERVATION_COLUMNS,
+                select(*[reservations.c[name] for name in RESERVATION_COLUMNS]).where(reservations.c.id.in_(ids))
+            )
+        )
+        result = db.execute(
+            insert(ArchivedReservationCost.__table__).from_select(
+                COST_COLUMNS,
+                select(*[costs.c[name] for name in COST_COLUMNS]).where(costs.c.reservation_id.in_(ids))
+            )
+        )
+        archived_costs += result.rowcount or 0
+        db.execute(delete(costs).where(costs.c.reservation_id.in_(ids)))
+        db.execute(delete(reservations).where(reservations.c.id.in_(ids)))
+        db.commit()
+        archived += len(ids)
+
+    skipped = db.query(Reservation.id).filter(Reservation.check_out < cutoff).count()
+    return {
+        "fecha_corte": cutoff,
+        "reservas_archivadas": archived,
+        "costos_archivados": archived_costs,
+        "reservas_omitidas_por_id_repetido": skipped,
+    }
+
+
+def all_reservations(*column_names):
+    """Subconsulta con las columnas pedidas de reservas activas y archivadas."""
+    names = column_names or RESERVATION_COLUMNS
+    hot = Reservation.__table__
+    archive = ArchivedReservation.__table__
+    return union_all(
+        select(*[hot.c[name] for name in names]),
+        select(*[archive.c[name] for name in names]),
+    ).subquery("all_reservations")
+
+
+def all_costs(*column_names):
+    """Subconsulta con las columnas pedidas de costos activos y archivados."""
+    names = column_names or COST_COLUMNS
+    hot = ReservationCost.__table__
+    archive = ArchivedReservationCost.__table__
+    return union_all(
+        select(*[hot.c[name] for name in names]),
+        select(*[archive.c[name] for name in names]),
+    ).subquery("all_costs")
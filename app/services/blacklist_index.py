@@ -0,0 +1,218 @@
+# Índice en memoria de la lista negra: teléfono normalizado (coincidencia exacta)
+# y trigramas del nombre (coincidencia aproximada). Se carga desde la base de datos
+# al iniciar y se actualiza de forma incremental en cada alta, cambio o baja. Como cada
+# worker tiene su propio índice, cada BLACKLIST_REFRESH_SECONDS se compara la versión
+# guardada en "data_versions" y, si otro worker escribió, se reconstruye en segundo
+# plano y se reemplaza de una vez, sin demorar la petición que hizo el control.
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import BlacklistEntry
+from app.services.data_versions import read_version
+from app.services.guests import normalize_e164
+
+# Similitud mínima (coeficiente de Dice sobre trigramas) para considerar que dos nombres coinciden
+NAME_SIMILARITY_THRESHOLD = 0.75
+BLACKLIST_REFRESH_SECONDS = float(os.getenv("BLACKLIST_REFRESH_SECONDS", "30"))
+BLACKLIST_VERSION = "blacklist"
+
+
+def normalize_phone(phone):
+    return normalize_e164(phone)
+
+
+def normalize_name(name):
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    return " ".join(name.split())
+
+
+def trigrams(normalized_name):
+    if not normalized_name:
+        return frozenset()
+    padded = f"  {normalized_name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class BlacklistIndex:
+    def __init__(self, threshold: float = NAME_SIMILARITY_THRESHOLD, refresh_seconds: float = BLACKLIST_REFRESH_SECONDS):
+        self.threshold = threshold
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        # Sólo una carga a la vez; las búsquedas siguen usando el índice anterior mientras tanto
+        self._load_lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._by_phone = defaultdict(set)
+        # Los trigramas apuntan a nombres normalizados distintos (no a entradas), agrupados
+        # por cantidad de trigramas: los nombres repetidos se comparan una sola vez
+        self._by_trigram = defaultdict(lambda: defaultdict(set))
+        self._name_entries = defaultdict(set)  # nombre normalizado -> ids de entradas
+        self._name_grams = {}  # nombre normalizado -> trigramas
+        self._entries = {}  # id -> (teléfono normalizado, nombre normalizado)
+
+    def ensure_loaded(self, db: Session):
+        """Carga el índice si todavía no se cargó (normalmente ya lo hizo reload() al iniciar)
+        y, si la versión en la base cambió, lanza la recarga en segundo plano."""
+        if self._version is None:
+            with self._load_lock:
+                if self._version is None:
+                    self._load(db)
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_seconds or self._load_lock.locked():
+            return
+        self._checked_at = now
+        if read_version(db, BLACKLIST_VERSION) != self._version:
+            threading.Thread(target=self.reload, kwargs={"blocking": False}, daemon=True,
+                             name="blacklist-reload").start()
+
+    def reload(self, blocking: bool = True):
+        """Recarga el índice con una sesión propia. Con blocking=False no hace nada si
+        ya hay otra carga en curso."""
+        if not self._load_lock.acquire(blocking=blocking):
+            return
+        try:
+            db = SessionLocal()
+            try:
+                self._load(db)
+            finally:
+                db.close()
+        finally:
+            self._load_lock.release()
+
+    def _load(self, db: Session):
+        # Se arma un índice nuevo sin tomar el lock y sólo se toma para reemplazarlo.
+        # Una escritura local que llegue durante la carga puede quedar afuera, pero en
+        # ese caso la versión cargada es anterior a la de la base y se vuelve a recargar.
+        version = read_version(db, BLACKLIST_VERSION)
+        fresh = BlacklistIndex(self.threshold, self.refresh_seconds)
+        rows = db.query(BlacklistEntry.id, BlacklistEntry.guest_name, BlacklistEntry.guest_phone).all()
+        for entry_id, guest_name, guest_phone in rows:
+            fresh._add(entry_id, guest_name, guest_phone)
+        with self._lock:
+            self._by_phone = fresh._by_phone
+            self._by_trigram = fresh._by_trigram
+            self._name_entries = fresh._name_entries
+            self._name_grams = fresh._name_grams
+            self._entries = fresh._entries
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def add(self, entry: BlacklistEntry, version=None):
+        """Aplica un alta o cambio. version es la que devolvió bump_version para esa escritura."""
+        with self._lock:
+            self._remove(entry.id)
+            self._add(entry.id, entry.guest_name, entry.guest_phone)
+            self._advance(version)
+
+    def remove(self, entry_id: int, version=None):
+        with self._lock:
+            self._remove(entry_id)
+            self._advance(version)
+
+    def _advance(self, version):
+        # Si la escritura local es la única posterior a lo cargado, el índice ya quedó
+        # al día y no hace falta recargarlo en el próximo control
+        if version is not None and self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._version = None
+
+    def _clear(self):
+        self._by_phone.clear()
+        self._by_trigram.clear()
+        self._name_entries.clear()
+        self._name_grams.clear()
+        self._entries.clear()
+
+    def _add(self, entry_id, guest_name, guest_phone):
+        phone = normalize_phone(guest_phone)
+        name = normalize_name(guest_name)
+        self._entries[entry_id] = (phone, name)
+        if phone:
+            self._by_phone[phone].add(entry_id)
+        if name:
+            if not self._name_entries[name]:
+                grams = self._name_grams[name] = trigrams(name)
+                for gram in grams:
+                    self._by_trigram[gram][len(grams)].add(name)
+            self._name_entries[name].add(entry_id)
+
+    def _remove(self, entry_id):
+        previous = self._entries.pop(entry_id, None)
+        if previous is None:
+            return
+        phone, name = previous
+        if phone:
+            ids = self._by_phone.get(phone)
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_phone[phone]
+        if name:
+            ids = self._name_entries.get(name)
+            ids.discard(entry_id)
+            if not ids:
+                del self._name_entries[name]
+                grams = self._name_grams.pop(name)
+                for gram in grams:
+                    by_length = self._by_trigram[gram]
+                    by_length[len(grams)].discard(name)
+                    if not by_length[len(grams)]:
+                        del by_length[len(grams)]
+                    if not by_length:
+                        del self._by_trigram[gram]
+
+    def _similar_names(self, grams):
+        # Filtro por longitud y por prefijo: un nombre con L trigramas y similitud >= t
+        # comparte al menos m = t·(|A| + L) / 2 trigramas con la consulta, así que aparece
+        # en alguno de los |A| - m + 1 trigramas de la consulta con menos nombres de ese largo.
+        size = len(grams)
+        t = self.threshold
+        postings = [self._by_trigram.get(gram, {}) for gram in grams]
+        name_grams = self._name_grams
+        similar = {}
+        for length in range(math.ceil(size * t / (2 - t)), math.floor(size * (2 - t) / t) + 1):
+            min_shared = math.ceil(t * (size + length) / 2)
+            rarest = sorted((by_length.get(length, ()) for by_length in postings), key=len)
+            candidates = set()
+            for names in rarest[:size - min_shared + 1]:
+                candidates.update(names)
+            for name in candidates:
+                similarity = 2 * len(grams & name_grams[name]) / (size + length)
+                if similarity >= t:
+                    similar[name] = similarity
+        return similar
+
+    def match(self, guest_name=None, guest_phone=None):
+        """Devuelve {entry_id: (motivo, similitud)} para las entradas que coinciden
+        con el teléfono exacto o con un nombre suficientemente parecido."""
+        matches = {}
+        phone = normalize_phone(guest_phone)
+        grams = trigrams(normalize_name(guest_name))
+        with self._lock:
+            if grams:
+                for name, similarity in self._similar_names(grams).items():
+                    for entry_id in self._name_entries[name]:
+                        matches[entry_id] = ("name", similarity)
+            if phone:
+                for entry_id in self._by_phone.get(phone, ()):
+                    matches[entry_id] = ("phone", 1.0)
+        return matches
+
+
+blacklist_index = BlacklistIndex()
@@ -0,0 +1,111 @@
+# Totales de costos pre-agregados por (departamento, categoría, mes).
+# create_cost/update_cost/delete_cost aplican el cambio de forma incremental dentro
+# de la misma transacción; rebuild_cost_rollups recalcula todo desde cero.
+import unicodedata
+from collections import defaultdict
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import CostRollup, Reservation, ReservationCost
+from app.services.archive import all_costs, all_reservations
+
+
+def normalize_category(category):
+    """Normaliza una categoría ("  Lavandería " -> "lavanderia"). Devuelve None si está vacía."""
+    if not category:
+        return None
+    category = unicodedata.normalize("NFKD", category)
+    category = "".join(c for c in category if not unicodedata.combining(c))
+    category = " ".join(category.lower().split())
+    return category or None
+
+
+def _month(value):
+    return value.replace(day=1) if value else None
+
+
+def _department_id(db: Session, cost: ReservationCost):
+    # Si el costo no indica departamento se toma el de la reserva
+    if cost.department_id is not None:
+        return cost.department_id
+    return db.query(Reservation.department_id).filter(Reservation.id == cost.reservation_id).scalar()
+
+
+def rollup_key(department_id, category, month):
+    return f"{'' if department_id is None else department_id}|{category or ''}|{month.isoformat() if month else ''}"
+
+
+def _apply(db: Session, department_id, category, month, amount, count):
+    key = rollup_key(department_id, category, month)
+    values = {CostRollup.total: CostRollup.total + amount, CostRollup.count: CostRollup.count + count}
+    if db.query(CostRollup).filter(CostRollup.rollup_key == key).update(values, synchronize_session=False):
+        return
+    # Primera fila de esa clave. Si otra transacción la insertó al mismo tiempo, el
+    # índice único rechaza esta y se vuelve a intentar como UPDATE
+    try:
+        with db.begin_nested():
+            db.add(CostRollup(rollup_key=key, department_id=department_id, category=category,
+                              month=month, total=amount, count=count))
+    except IntegrityError:
+        db.query(CostRollup).filter(CostRollup.rollup_key == key).update(values, synchronize_session=False)
+
+
+def cost_key(db: Session, cost: ReservationCost):
+    """Clave del rollup de un costo, para guardarla antes de modificarlo."""
+    return _department_id(db, cost), normalize_category(cost.category), _month(cost.date), cost.amount or 0
+
+
+def add_cost(db: Session, cost: ReservationCost):
+    department_id, category, month, amount = cost_key(db, cost)
+    _apply(db, department_id, category, month, amount, 1)
+
+
+def remove_cost(db: Session, key):
+    department_id, category, month, amount = key
+    _apply(db, department_id, category, month, -amount, -1)
+
+
+def move_reservation_costs(db: Session, reservation_id: int, old_department_id, new_department_id):
+    """Pasa al nuevo departamento los costos de la reserva que no indican departamento
+    propio (se agrupan con el de la reserva). Se llama cuando cambia department_id."""
+    costs = db.query(ReservationCost.category, ReservationCost.date, ReservationCost.amount).filter(
+        ReservationCost.reservation_id == reservation_id,
+        ReservationCost.department_id.is_(None),
+    ).all()
+    for category, cost_date, amount in costs:
+        category, month, amount = normalize_category(category), _month(cost_date), amount or 0
+        _apply(db, old_department_id, category, month, -amount, -1)
+        _apply(db, new_department_id, category, month, amount, 1)
+
+
+def rebuild_cost_rollups(db: Session, batch_size: int = 5000):
+    """Normaliza las categorías guardadas y recalcula todos los rollups
+    (incluye los costos de reservas archivadas)."""
+    for (category,) in db.query(ReservationCost.category).distinct().all():
+        normalized = normalize_category(category)
+        if normalized != category:
+            db.query(ReservationCost).filter(ReservationCost.category == category) \
+                .update({ReservationCost.category: normalized}, synchronize_session=False)
+
+    costs = all_costs("reservation_id", "department_id", "category", "date", "amount")
+    reservations = all_reservations("id", "department_id")
+    rows = db.query(
+        costs.c.department_id, reservations.c.department_id, costs.c.category, costs.c.date, costs.c.amount
+    ).outerjoin(reservations, reservations.c.id == costs.c.reservation_id).yield_per(batch_size)
+
+    totals = defaultdict(lambda: [0.0, 0])
+    for cost_department_id, reservation_department_id, category, cost_date, amount in rows:
+        department_id = cost_department_id if cost_department_id is not None else reservation_department_id
+        key = (department_id, normalize_category(category), _month(cost_date))
+        totals[key][0] += amount or 0
+        totals[key][1] += 1
+
+    db.query(CostRollup).delete(synchronize_session=False)
+    db.bulk_insert_mappings(CostRollup, [
+        {"rollup_key": rollup_key(department_id, category, month), "department_id": department_id,
+         "category": category, "month": month, "total": total, "count": count}
+        for (department_id, category, month), (total, count) in totals.items()
+    ])
+    db.commit()
+    return {"rollups": len(totals), "costos": sum(count for _, count in totals.values())}
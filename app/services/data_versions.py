@@ -0,0 +1,22 @@
+# Versiones de datos compartidas entre workers (tabla "data_versions").
+# Cada escritura incrementa la versión de lo que cambió dentro de su transacción;
+# los workers que guardan copias en memoria la comparan para saber si están al día.
+from sqlalchemy.orm import Session
+
+from app.models.models import DataVersion
+
+
+def read_version(db: Session, name: str):
+    return db.query(DataVersion.version).filter(DataVersion.name == name).scalar() or 0
+
+
+def bump_version(db: Session, name: str):
+    """Incrementa la versión dentro de la transacción actual (el commit lo hace la ruta)
+    y devuelve el nuevo valor."""
+    updated = db.query(DataVersion).filter(DataVersion.name == name).update(
+        {DataVersion.version: DataVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(DataVersion(name=name, version=1))
+        return 1
+    return read_version(db, name)
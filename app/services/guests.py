@@ -0,0 +1,182 @@
+# Normalización de teléfonos a E.164 y vinculación de reservas con su huésped.
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import ArchivedReservation, Base, Guest, Reservation
+
+# Código de país de Argentina; los números sin código internacional se asumen argentinos
+DEFAULT_COUNTRY_CODE = "54"
+
+
+def _strip_mobile_15(national):
+    # Formato local de celulares: código de área (2 a 4 dígitos) + "15" + número.
+    # Sin una tabla de áreas, se prueba primero el área de Buenos Aires (11) y luego 3 y 4 dígitos.
+    lengths = (2,) if national.startswith("11") else (3, 4, 2)
+    for area_length in lengths:
+        if national[area_length:area_length + 2] == "15":
+            return national[:area_length] + national[area_length + 2:]
+    return None
+
+
+def normalize_e164(phone):
+    """Convierte un teléfono libre a E.164. Para Argentina la clave es +54 seguido de
+    los 10 dígitos del número nacional: se quitan el 0 troncal, el 15 de los celulares
+    y el 9 móvil, porque los huéspedes escriben el mismo celular con y sin ellos.
+    Devuelve None si no es válido.
+
+    >>> normalize_e164("+54 9 11 9999-0000")
+    '+541199990000'
+    >>> normalize_e164("+54 11 9999-0000")
+    '+541199990000'
+    >>> normalize_e164("11 9999 0000")
+    '+541199990000'
+    >>> normalize_e164("011 15-9999-0000")
+    '+541199990000'
+    >>> normalize_e164("11 15 9999 0000")
+    '+541199990000'
+    >>> normalize_e164("0351 15 123-4567")
+    '+543511234567'
+    >>> normalize_e164("+1 415 555 0100")
+    '+14155550100'
+    >>> normalize_e164("099 123 456") is None
+    True
+    """
+    if not phone:
+        return None
+    phone = phone.strip()
+    digits = re.sub(r"\D", "", phone)
+
+    if phone.startswith("+") or digits.startswith("00"):
+        digits = digits.lstrip("0")
+        if not digits.startswith(DEFAULT_COUNTRY_CODE):
+            # Número extranjero: se conserva tal cual
+            return "+" + digits if 8 <= len(digits) <= 15 else None
+        national = digits[len(DEFAULT_COUNTRY_CODE):]
+    elif digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) >= 12:
+        # Código de país sin "+" (ningún código de área argentino empieza con 5)
+        national = digits[len(DEFAULT_COUNTRY_CODE):]
+    else:
+        national = digits.lstrip("0")
+
+    if national.startswith("9") and len(national) >= 11:
+        national = national[1:]
+    if len(national) == 12:
+        national = _strip_mobile_15(national)
+    if national is None or len(national) != 10:
+        return None
+    return "+" + DEFAULT_COUNTRY_CODE + national
+
+
+def get_or_create_guest(db: Session, guest_name: str, guest_phone):
+    """Devuelve el huésped con ese teléfono (creándolo si no existe) o None si el
+    teléfono no es válido. No hace commit: queda dentro de la transacción actual."""
+    phone = normalize_e164(guest_phone)
+    if phone is None:
+        return None
+    guest = db.query(Guest).filter(Guest.phone_e164 == phone).first()
+    if guest is None:
+        # Otra petición pudo crear el mismo huésped en paralelo: el índice único lo
+        # rechaza, se deshace sólo el savepoint y se usa el que ya existe
+        try:
+            with db.begin_nested():
+                guest = Guest(name=guest_name, phone_e164=phone)
+                db.add(guest)
+        except IntegrityError:
+            guest = db.query(Guest).filter(Guest.phone_e164 == phone).first()
+    return guest
+
+
+def add_guest_column(engine):
+    """Agrega reservations.guest_id y su índice en bases creadas antes de la tabla de
+    huéspedes: create_all crea las tablas nuevas pero no agrega columnas a las existentes."""
+    Base.metadata.create_all(bind=engine)
+    columns = {column["name"] for column in inspect(engine).get_columns(Reservation.__tablename__)}
+    with engine.begin() as conn:
+        if "guest_id" not in columns:
+            conn.execute(text(f"ALTER TABLE {Reservation.__tablename__} ADD COLUMN guest_id INTEGER REFERENCES guests (id)"))
+        for index in Reservation.__table__.indexes:
+            if "guest_id" in index.columns:
+                index.create(conn, checkfirst=True)
+
+
+def _merge_guest_keys(db: Session):
+    # Los teléfonos guardados con una normalización anterior (p. ej. celulares con el 9
+    # móvil) se pasan a la clave actual; si dos huéspedes quedan con la misma, las
+    # reservas pasan al de menor ID y el otro se borra
+    by_key = {}
+    for guest_id, phone in db.query(Guest.id, Guest.phone_e164).order_by(Guest.id).all():
+        by_key.setdefault(normalize_e164(phone) or phone, []).append((guest_id, phone))
+
+    merged = 0
+    renamed = []
+    for key, guests in by_key.items():
+        keep_id, keep_phone = guests[0]
+        duplicate_ids = [guest_id for guest_id, _ in guests[1:]]
+        if duplicate_ids:
+            for model in (Reservation, ArchivedReservation):
+                db.query(model).filter(model.guest_id.in_(duplicate_ids)) \
+                    .update({model.guest_id: keep_id}, synchronize_session=False)
+            db.query(Guest).filter(Guest.id.in_(duplicate_ids)).delete(synchronize_session=False)
+            merged += len(duplicate_ids)
+        if keep_phone != key:
+            renamed.append({"id": keep_id, "phone_e164": key})
+    # Se borran los duplicados antes de renombrar para no chocar con el índice único
+    db.flush()
+    if renamed:
+        db.bulk_update_mappings(Guest, renamed)
+    db.commit()
+    return merged
+
+
+def _link_guests(db: Session, model, guest_ids, batch_size):
+    last_id = 0
+    linked = 0
+    created = 0
+
+    while True:
+        batch = db.query(model.id, model.guest_name, model.guest_phone).filter(
+            model.guest_id.is_(None),
+            model.id > last_id,
+        ).order_by(model.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        updates = []
+        for reservation_id, guest_name, guest_phone in batch:
+            phone = normalize_e164(guest_phone)
+            if phone is None:
+                continue
+            if phone not in guest_ids:
+                guest = Guest(name=guest_name, phone_e164=phone)
+                db.add(guest)
+                db.flush()
+                guest_ids[phone] = guest.id
+                created += 1
+            updates.append({"id": reservation_id, "guest_id": guest_ids[phone]})
+
+        if updates:
+            db.bulk_update_mappings(model, updates)
+        db.commit()
+        linked += len(updates)
+        last_id = batch[-1].id
+
+    return linked, created
+
+
+def backfill_guests(db: Session, batch_size: int = 1000):
+    """Vincula las reservas existentes sin huésped (activas y archivadas), deduplicando
+    por teléfono. Antes unifica los huéspedes ya creados cuya clave cambió con la
+    normalización actual. Procesa por lotes ordenados por ID y hace commit al final de cada lote."""
+    merged = _merge_guest_keys(db)
+    guest_ids = dict(db.query(Guest.phone_e164, Guest.id).all())
+    linked = 0
+    created = 0
+    for model in (Reservation, ArchivedReservation):
+        model_linked, model_created = _link_guests(db, model, guest_ids, batch_size)
+        linked += model_linked
+        created += model_created
+
+    return {"reservas_vinculadas": linked, "huespedes_creados": created, "huespedes_unificados": merged}
@@ -0,0 +1,174 @@
+# Ejecución de trabajos pesados fuera del ciclo de la petición.
+# Un pool acotado de hilos procesa los trabajos; el estado y el progreso se
+# guardan en la tabla "jobs" y el resultado se escribe en un archivo local.
+import csv
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.models import Job, JobStatus
+from app.services.analytics import occupancy_metrics
+from app.services.archive import RESERVATION_COLUMNS, all_reservations, archive_reservations
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "20")) # Trabajos en cola + en ejecución
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR", "job_results")
+EXPORT_BATCH_SIZE = 1000
+
+OWNER_HOST = socket.gethostname()
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_slots = threading.BoundedSemaphore(JOB_MAX_PENDING)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _result_path(job_id, extension):
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    return os.path.join(JOB_RESULTS_DIR, f"{job_id}.{extension}")
+
+
+# --- Tipos de trabajo ---------------------------------------------------------
+# Cada función recibe (db, job_id, params, set_progress) y devuelve la ruta del resultado.
+
+def _export_reservations(db, job_id, params, set_progress):
+    # Incluye las reservas archivadas; los IDs no se repiten entre las dos tablas,
+    # así que se pagina por ID sobre la unión
+    reservations = all_reservations()
+    total = db.execute(select(func.count()).select_from(reservations)).scalar()
+    path = _result_path(job_id, "csv")
+    last_id = 0
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESERVATION_COLUMNS)
+        while True:
+            batch = db.execute(
+                select(reservations)
+                .where(reservations.c.id > last_id)
+                .order_by(reservations.c.id)
+                .limit(EXPORT_BATCH_SIZE)
+            ).all()
+            if not batch:
+                break
+            writer.writerows(batch)
+            written += len(batch)
+            last_id = batch[-1].id
+            set_progress(written / total if total else 1)
+    return path
+
+
+def _occupancy_report(db, job_id, params, set_progress):
+    # Los parámetros ya fueron validados al encolar (OccupancyReportParams)
+    start = date.fromisoformat(params["start"])
+    end = date.fromisoformat(params["end"])
+    group_by = params["group_by"]
+    rows = occupancy_metrics(db, start, end, group_by)
+    path = _result_path(job_id, "json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"start": str(start), "end": str(end), "group_by": group_by, "rows": rows}, f, ensure_ascii=False)
+    return path
+
+
+def _archive(db, job_id, params, set_progress):
+    result = archive_reservations(db, params["horizon_days"], params["batch_size"])
+    path = _result_path(job_id, "json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, default=str, ensure_ascii=False)
+    return path
+
+
+JOB_KINDS = {
+    "reservations_export": _export_reservations,
+    "occupancy_report": _occupancy_report,
+    "archive": _archive,
+}
+
+
+# --- Ejecución ----------------------------------------------------------------
+
+def _update_job(job_id, **fields):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_job(job_id, kind, params):
+    try:
+        _update_job(job_id, status=JobStatus.running, started_at=datetime.utcnow())
+
+        def set_progress(progress):
+            _update_job(job_id, progress=min(max(progress, 0.0), 1.0))
+
+        db = SessionLocal()
+        try:
+            path = JOB_KINDS[kind](db, job_id, params, set_progress)
+        finally:
+            db.close()
+        _update_job(job_id, status=JobStatus.done, progress=1.0, result_path=path, finished_at=datetime.utcnow())
+    except Exception as exc:
+        _update_job(job_id, status=JobStatus.failed, error=str(exc), finished_at=datetime.utcnow())
+    finally:
+        _slots.release()
+
+
+def submit_job(db, kind: str, params: dict):
+    """Registra el trabajo y lo encola. Lanza JobQueueFull si ya hay demasiados pendientes."""
+    if not _slots.acquire(blocking=False):
+        raise JobQueueFull()
+    try:
+        job = Job(id=str(uuid.uuid4()), kind=kind, params=params, status=JobStatus.queued,
+                  progress=0, owner_host=OWNER_HOST, owner_pid=os.getpid(), created_at=datetime.utcnow())
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except Exception:
+        _slots.release()
+        raise
+    _executor.submit(_run_job, job.id, kind, params)
+    return job
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def fail_interrupted_jobs():
+    """Marca como fallidos los trabajos pendientes cuyo proceso dueño (en esta misma
+    máquina) ya no existe. Los de otros workers vivos o de otras máquinas no se tocan."""
+    db = SessionLocal()
+    try:
+        pending = db.query(Job.id, Job.owner_pid).filter(
+            Job.status.in_([JobStatus.queued, JobStatus.running]),
+            Job.owner_host == OWNER_HOST,
+        ).all()
+        orphaned = [
+            job_id for job_id, owner_pid in pending
+            if owner_pid != os.getpid() and (owner_pid is None or not _process_alive(owner_pid))
+        ]
+        if orphaned:
+            db.query(Job).filter(Job.id.in_(orphaned)).update(
+                {"status": JobStatus.failed, "error": "Interrumpido por reinicio del servidor", "finished_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+    finally:
+        db.close()
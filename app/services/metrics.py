@@ -0,0 +1,156 @@
+# Métricas en formato de texto de Prometheus, sin dependencias externas.
+# Cada hilo acumula en su propio "shard" (sin locks en el camino caliente);
+# al pedir /metrics se suman todos los shards. Cuando un hilo termina, su shard
+# se suma a un acumulado de hilos terminados y se saca de la lista.
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+# Límites superiores (en segundos) de los buckets de los histogramas de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HELP = {
+    "http_requests_total": ("counter", "Peticiones HTTP atendidas"),
+    "http_request_duration_seconds": ("histogram", "Latencia de las peticiones HTTP"),
+    "http_requests_in_flight": ("gauge", "Peticiones HTTP en curso"),
+    "bcrypt_duration_seconds": ("histogram", "Tiempo de CPU en hash/verificación bcrypt"),
+    "reservations_created_total": ("counter", "Reservas creadas"),
+    "reservation_overlap_rejections_total": ("counter", "Reservas rechazadas por superposición de fechas"),
+    "db_pool_size": ("gauge", "Tamaño configurado del pool de conexiones"),
+    "db_pool_checked_out": ("gauge", "Conexiones del pool en uso"),
+    "db_pool_checked_in": ("gauge", "Conexiones del pool libres"),
+    "db_pool_overflow": ("gauge", "Conexiones abiertas por encima del tamaño del pool"),
+}
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def merge(self, other):
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in list(other.histograms.items()):
+            merged = self.histograms.setdefault(key, [0] * len(values[:-1]) + [0.0])
+            for i, value in enumerate(values):
+                merged[i] += value
+
+
+class _ThreadToken:
+    # Objeto guardado en el threading.local: se libera cuando el hilo termina
+    __slots__ = ("__weakref__",)
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()  # Suma de los shards de hilos que ya terminaron
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            self._local.token = token = _ThreadToken()
+            weakref.finalize(token, self._retire, shard)
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _retire(self, shard):
+        with self._shards_lock:
+            self._retired.merge(shard)
+            self._shards.remove(shard)
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # [conteo por bucket..., +Inf, suma]
+            histogram = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(self.buckets)] += 1
+        histogram[-1] += value
+
+    @contextmanager
+    def timer(self, name, labels=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def _collect(self):
+        total = _Shard()
+        with self._shards_lock:
+            total.merge(self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            total.merge(shard)
+        return total.counters, total.histograms
+
+    def render(self, gauges=()):
+        """Texto en formato de exposición de Prometheus. gauges: [(nombre, labels, valor)]."""
+        counters, histograms = self._collect()
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), values in histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        for name, labels, value in gauges:
+            families.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+
+        output = []
+        for name in sorted(families):
+            kind, description = _HELP.get(name, ("gauge", name))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(families[name])
+        return "\n".join(output) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def pool_gauges(engine):
+    """Uso del pool de conexiones del engine (sólo los pools que exponen estos datos)."""
+    pool = engine.pool
+    gauges = []
+    for name, method in (("db_pool_size", "size"), ("db_pool_checked_out", "checkedout"),
+                         ("db_pool_overflow", "overflow"), ("db_pool_checked_in", "checkedin")):
+        if hasattr(pool, method):
+            value = getattr(pool, method)()
+            if name == "db_pool_overflow":
+                # QueuePool.overflow() arranca en -pool_size; sólo interesan las conexiones extra
+                value = max(0, value)
+            gauges.append((name, (), value))
+    return gauges
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,158 @@
+# Perfilado bajo demanda de los handlers.
+# Se activa por petición con el header "X-Profile: 1" (sólo con token de admin)
+# o para una fracción aleatoria del tráfico (PROFILE_SAMPLE_RATE). El perfil de
+# cProfile se guarda en PROFILE_DIR como .prof (abrible con snakeviz o flameprof)
+# junto a un .json con la ruta, la duración y el tiempo pasado en SQL.
+import cProfile
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.datastructures import Headers
+
+from app.auth.security import verify_token
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = "x-profile"
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200")) # Perfiles que se conservan; se borran los más viejos
+
+# Desde Python 3.12 cProfile usa un hook global del intérprete y no admite dos perfiles
+# simultáneos: si ya hay uno en curso, la otra petición se ejecuta sin perfilar
+_profiler_lock = threading.Lock()
+
+_profile_requested = ContextVar("profile_requested", default=False)
+_sql_timings = ContextVar("sql_timings", default=None)
+
+
+def _is_admin(headers: Headers):
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    payload = verify_token(authorization[7:])
+    return payload is not None and payload.get("role") == "admin"
+
+
+def mark_request(headers: Headers):
+    """Decide si la petición se perfila. Se llama desde el middleware, antes de ejecutar el handler."""
+    if headers.get(PROFILE_HEADER) == "1" and _is_admin(headers):
+        _profile_requested.set(True)
+    elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        _profile_requested.set(True)
+
+
+def install_sql_timer(engine):
+    """Acumula el tiempo de cada consulta SQL cuando la petición actual se está perfilando."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _sql_timings.get() is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _sql_timings.get()
+        if timings is not None and conn.info.get("profile_query_start"):
+            timings.append(time.perf_counter() - conn.info["profile_query_start"].pop())
+
+
+def _save_profile(route_path, method, profiler, duration, sql_timings):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", route_path).strip("_") or "root"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}_{method.lower()}_{slug}_{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+    with open(os.path.join(PROFILE_DIR, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "name": name,
+            "route": route_path,
+            "method": method,
+            "created_at": datetime.utcnow().isoformat(),
+            "duration_seconds": duration,
+            "sql_queries": len(sql_timings),
+            "sql_seconds": sum(sql_timings),
+        }, f)
+    _prune_profiles()
+
+
+def _prune_profiles():
+    # Los nombres empiezan con la fecha, así que el orden alfabético es el cronológico
+    names = sorted(filename[:-5] for filename in os.listdir(PROFILE_DIR) if filename.endswith(".json"))
+    for name in names[:max(0, len(names) - PROFILE_MAX_FILES)]:
+        for extension in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name + extension))
+            except FileNotFoundError:
+                pass
+
+
+class ProfiledRoute(APIRoute):
+    """Ruta cuyo handler se ejecuta bajo cProfile cuando la petición fue marcada."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        # Sólo se envuelven handlers síncronos: se ejecutan en su propio hilo del threadpool.
+        # include_router vuelve a crear la ruta con el endpoint ya envuelto, por eso se marca.
+        if not inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "__profiled__", False):
+            endpoint = _profiled(endpoint, path, kwargs.get("methods"))
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _profiled(endpoint, path, methods):
+    method = ",".join(sorted(methods)) if methods else "GET"
+
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        if not _profile_requested.get() or not _profiler_lock.acquire(blocking=False):
+            return endpoint(*args, **kwargs)
+
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Otra herramienta de perfilado externa está activa
+                return endpoint(*args, **kwargs)
+
+            sql_timings = []
+            token = _sql_timings.set(sql_timings)
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+                _sql_timings.reset(token)
+                _save_profile(path, method, profiler, duration, sql_timings)
+        finally:
+            _profiler_lock.release()
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if filename.endswith(".json"):
+            with open(os.path.join(PROFILE_DIR, filename), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+    return profiles
+
+
+def profile_path(name: str):
+    """Ruta del .prof con ese nombre, o None si no existe (evita salir de PROFILE_DIR)."""
+    if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{name}.prof")
+    return path if os.path.exists(path) else None
@@ -0,0 +1,141 @@
+# Caché en memoria para datos de referencia (departamentos, plataformas) que se leen
+# constantemente y cambian muy poco. Las entradas se agrupan por "tags" y las rutas
+# que escriben invalidan su tag e incrementan su versión en "data_versions"; los demás
+# workers la comparan como mucho cada CACHE_VERSION_CHECK_SECONDS e invalidan el tag
+# si cambió. El tamaño total está acotado (LRU) y cada entrada vence a los CACHE_TTL_SECONDS.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.services.data_versions import read_version
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_CONTROL = os.getenv("CACHE_CONTROL", "private, max-age=60")
+CACHE_VERSION_CHECK_SECONDS = float(os.getenv("CACHE_VERSION_CHECK_SECONDS", "5"))
+
+DEPARTMENTS_TAG = "departments"
+PLATFORMS_TAG = "booking_platforms"
+
+_MISSING = object()
+
+
+class TaggedLRUCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (valor, tamaño, tags, vencimiento)
+        self._by_tag = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[3] < time.monotonic():
+                self._drop(key)
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, tags=(), size: int = 1):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, tuple(tags), time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        value, size, tags, _ = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+cache = TaggedLRUCache()
+
+
+def _not_modified(request: Request, etag: str):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in (value.strip() for value in if_none_match.split(",")) or if_none_match.strip() == "*"
+
+
+_tag_versions = {}  # tag -> (versión vista, momento del último control)
+
+
+def sync_tags(db: Session, tags):
+    """Invalida los tags cuya versión en la base cambió (escrituras de otros workers).
+    Cada tag se consulta como mucho una vez cada CACHE_VERSION_CHECK_SECONDS."""
+    now = time.monotonic()
+    for tag in tags:
+        seen, checked_at = _tag_versions.get(tag, (None, float("-inf")))
+        if now - checked_at < CACHE_VERSION_CHECK_SECONDS:
+            continue
+        version = read_version(db, tag)
+        if version != seen:
+            cache.invalidate(tag)
+        _tag_versions[tag] = (version, now)
+
+
+def cached_json_response(request: Request, db: Session, tags, build):
+    """Responde desde la caché (JSON ya serializado, con ETag) o llama a build(),
+    guarda el resultado y lo devuelve. Las excepciones de build() no se guardan."""
+    sync_tags(db, tags)
+    key = ("response", request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = cache.get(key)
+    if entry is None:
+        body = json.dumps(jsonable_encoder(build()), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = (body, etag)
+        cache.set(key, entry, tags, size=len(body))
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_value(key, tags, build):
+    """Versión para valores internos (no respuestas HTTP), p. ej. búsquedas de plataformas."""
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = build()
+        cache.set(key, value, tags)
+    return value
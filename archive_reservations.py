@@ -0,0 +1,10 @@
+from app.database import SessionLocal
+from app.services.archive import archive_reservations
+
+print("Archivando reservas históricas...")
+db = SessionLocal()
+try:
+    result = archive_reservations(db)
+finally:
+    db.close()
+print(f"¡Listo! {result['reservas_archivadas']} reservas y {result['costos_archivados']} costos archivados (corte: {result['fecha_corte']}).")
@@ -0,0 +1,13 @@
+from app.database import SessionLocal, engine
+from app.services.guests import add_guest_column, backfill_guests
+
+print("Agregando la columna de huésped a las reservas (si falta)...")
+add_guest_column(engine)
+print("Vinculando reservas existentes con huéspedes...")
+db = SessionLocal()
+try:
+    result = backfill_guests(db)
+finally:
+    db.close()
+print(f"¡Listo! {result['reservas_vinculadas']} reservas vinculadas, {result['huespedes_creados']} huéspedes nuevos, "
+      f"{result['huespedes_unificados']} huéspedes unificados.")
@@ -1,6 +1,9 @@
 from app.models.models import Base
 from app.database import engine
+from app.services.guests import add_guest_column
 
 print("Creando tablas en la base de datos...")
 Base.metadata.create_all(bind=engine)
+# create_all no agrega columnas nuevas a tablas que ya existen
+add_guest_column(engine)
 print("¡Tablas creadas exitosamente!")
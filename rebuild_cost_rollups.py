@@ -0,0 +1,10 @@
+from app.database import SessionLocal
+from app.services.cost_rollup import rebuild_cost_rollups
+
+print("Recalculando totales de costos...")
+db = SessionLocal()
+try:
+    result = rebuild_cost_rollups(db)
+finally:
+    db.close()
+print(f"¡Listo! {result['costos']} costos agrupados en {result['rollups']} rollups.")